@@ -1,32 +1,167 @@
+import asyncio
+import atexit
+import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from typing import Optional, Protocol
+from typing import AsyncContextManager, AsyncIterator, Optional, Protocol, Union
 import uuid
+import msgspec
+import requests
 import stripe
 from stripe.error import StripeError
-from stripe import Charge
+from stripe import AIOHTTPClient, Charge, RequestsClient
 from dotenv import load_dotenv
 from email.mime.text import MIMEText
 from pydantic import BaseModel
 
+try:
+    import liburing
+except ImportError:  # io_uring is Linux only
+    liburing = None
+
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file
 _ = load_dotenv()
 
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
+STRIPE_PRICE_ID = os.getenv("STRIPE_PRICE_ID")
+
+stripe.api_key = STRIPE_SECRET_KEY
+
+# Stripe allows up to 100 requests per second in live mode
+STRIPE_MAX_CONCURRENCY = 100
+BATCH_MAX_WORKERS = 32
+
+
+def _stripe_session() -> requests.Session:
+    # Without an explicit session the Stripe client opens one per thread;
+    # size the shared pool so every batch worker keeps its connection alive
+    session = requests.Session()
+    session.mount(
+        "https://", requests.adapters.HTTPAdapter(pool_maxsize=BATCH_MAX_WORKERS)
+    )
+    return session
+
+
+# Share one pooled HTTP session across every synchronous Stripe call
+if stripe.default_http_client is None:
+    stripe.default_http_client = RequestsClient(
+        verify_ssl_certs=True, session=_stripe_session()
+    )
+
+
+TRANSACTIONS_LOG = "transactions.log"
+LOG_BUFFER_SIZE = 1 << 16
+LOG_URING_ENTRIES = 256
+LOG_FLUSH_INTERVAL = 1.0
+
+_log_file = None
+_log_file_lock = threading.Lock()
+_log_file_closed = threading.Event()
+
+
+def _start_flush_thread(flush, interval: float, stopped: threading.Event):
+    # Writes buffered records out at least every `interval` seconds, so an
+    # idle process does not hold them in memory indefinitely
+    def run():
+        while not stopped.wait(interval):
+            try:
+                flush()
+            except Exception:
+                logger.exception("Failed to flush the transaction log")
+
+    threading.Thread(target=run, name="transaction-log-flush", daemon=True).start()
+
+
+def _close_transaction_log():
+    _log_file_closed.set()
+    _log_file.close()
+
+
+def _transaction_log():
+    # Opened on first use and kept for the process lifetime instead of being
+    # reopened on every payment. Records are buffered in memory and flushed
+    # every LOG_FLUSH_INTERVAL seconds, so a crash loses at most that long
+    # (and at most LOG_BUFFER_SIZE bytes) of payment records. The buffer is
+    # also flushed before fork so a child never writes the parent's records
+    global _log_file
+    if _log_file is None:
+        with _log_file_lock:
+            if _log_file is None:
+                _log_file = open(TRANSACTIONS_LOG, "ab", buffering=LOG_BUFFER_SIZE)
+                atexit.register(_close_transaction_log)
+                os.register_at_fork(
+                    before=_log_file.flush,
+                    after_in_child=lambda: _start_flush_thread(
+                        _log_file.flush, LOG_FLUSH_INTERVAL, _log_file_closed
+                    ),
+                )
+                _start_flush_thread(
+                    _log_file.flush, LOG_FLUSH_INTERVAL, _log_file_closed
+                )
+    return _log_file
+
+
+# Slotted counterparts of the pydantic models, passed around inside
+# PaymentService once the input has been validated at its boundary
+@dataclass(slots=True, frozen=True)
+class ContactInfoFast:
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+
+@dataclass(slots=True, frozen=True)
+class CustomerDataFast:
+    name: str
+    contact_info: ContactInfoFast
+    id: Optional[str] = None
+
+
+@dataclass(slots=True, frozen=True)
+class PaymentDataFast:
+    amount: int
+    source: str
+    payment_id: Optional[str] = None
+
 
 class ContactInfo(BaseModel):
     email: Optional[str] = None
     phone: Optional[str] = None
 
+    def to_fast(self) -> ContactInfoFast:
+        return ContactInfoFast(email=self.email, phone=self.phone)
+
 
 class CustomerData(BaseModel):
     name: str
     contact_info: ContactInfo
     id: Optional[str] = None
 
+    def to_fast(self) -> CustomerDataFast:
+        return CustomerDataFast(
+            name=self.name, contact_info=self.contact_info.to_fast(), id=self.id
+        )
+
 
 class PaymentData(BaseModel):
     amount: int
     source: str
+    # Identifies one payment attempt; reuse it only when retrying that attempt
+    payment_id: Optional[str] = None
+
+    def to_fast(self) -> PaymentDataFast:
+        return PaymentDataFast(
+            amount=self.amount, source=self.source, payment_id=self.payment_id
+        )
+
+
+# JSON input is decoded and type-checked straight into the dataclasses above
+_CUSTOMER_DECODER = msgspec.json.Decoder(CustomerDataFast)
+_PAYMENT_DECODER = msgspec.json.Decoder(PaymentDataFast)
 
 
 @dataclass
@@ -37,102 +172,259 @@ class PaymentResponse:
     message: Optional[str] = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ValidateData:
-    def validate_customer_data(self, customer_data: CustomerData):
+    def validate_customer_data(self, customer_data: CustomerDataFast):
+        # contact_info is a required, typed field on every input path
+        contact_info = customer_data.contact_info
         if not customer_data.name:
-            print("Invalid customer data: missing name")
             raise ValueError("Invalid customer data: missing name")
-        if not customer_data.contact_info:
-            print("Invalid customer data: missing contact info")
-            raise ValueError("Invalid customer data: missing contact info")
-        if (
-            not customer_data.contact_info.email
-            and not customer_data.contact_info.phone
-        ):
-            print("Invalid customer data: missing email or phone")
+        if not (contact_info.email or contact_info.phone):
             raise ValueError("Invalid customer data: missing email or phone")
-        return
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ValidatePaymentData:
-    def validate_payment_data(self, payment_data: PaymentData):
-        if not payment_data.amount or not payment_data.source:
-            print("Invalid payment data")
+    def validate_payment_data(self, payment_data: PaymentDataFast):
+        if not (payment_data.amount and payment_data.source):
             raise ValueError("Invalid payment data")
         return True
 
 
 class Notify(Protocol):
-    def notify_customer(self, customer_data: CustomerData): ...
+    def notify_customer(self, customer_data: CustomerDataFast): ...
+
+
+def _build_confirmation_email() -> bytes:
+    msg = MIMEText("Thank you for your payment.")
+    msg["Subject"] = "Payment Confirmation"
+    msg["From"] = "no-reply@example.com"
+    return msg.as_bytes()
+
+
+# Serialized once; each notification only prepends its recipient header
+_CONFIRMATION_EMAIL = _build_confirmation_email()
 
 
 @dataclass
 class EmailNotify(Notify):
-    def notify_customer(self, customer_data: CustomerData):
-        msg = MIMEText("Thank you for your payment.")
-        msg["Subject"] = "Payment Confirmation"
-        msg["From"] = "no-reply@example.com"
-        msg["To"] = customer_data.contact_info.email
-        print("Email sent to", customer_data.contact_info.email)
-        return
+    def notify_customer(self, customer_data: CustomerDataFast) -> bytes:
+        email = customer_data.contact_info.email
+        if not email:
+            raise ValueError("Invalid customer data: missing email")
+        # The address goes into the raw header, so a line break would let it
+        # inject extra headers, and a header without SMTPUTF8 must stay ASCII
+        if "\r" in email or "\n" in email or not email.isascii():
+            raise ValueError("Invalid customer data: malformed email")
+        msg = b"To: %s\n%s" % (email.encode("ascii"), _CONFIRMATION_EMAIL)
+        logger.info("Email sent to %s", email)
+        return msg
 
 
 @dataclass
 class SMSNotify(Notify):
-    def notify_customer(self, customer_data: CustomerData):
+    def notify_customer(self, customer_data: CustomerDataFast):
         phone_number = customer_data.contact_info.phone
         sms_gateway = "the custom SMS Gateway"
-        print(
-            f"send the sms using {sms_gateway}: SMS sent to {phone_number}: Thank you for your payment."
+        logger.info(
+            "send the sms using %s: SMS sent to %s: Thank you for your payment.",
+            sms_gateway,
+            phone_number,
         )
         return
 
 
-@dataclass
+class LogTransactionProtocol(Protocol):
+    def log_transaction(
+        self, customer_data: CustomerDataFast, payment_data: PaymentDataFast, charge
+    ): ...
+
+
+_LOG_RECORD_FMT = b"%s paid %d\nTransaction ID: %s\nStatus: %s\n"
+
+
+def _format_log_record(
+    customer_data: CustomerDataFast, payment_data: PaymentDataFast, charge
+) -> bytes:
+    # Failed payments carry no transaction id, logged as "None" like before
+    return _LOG_RECORD_FMT % (
+        customer_data.name.encode(),
+        payment_data.amount,
+        str(charge.id).encode(),
+        charge.status.encode(),
+    )
+
+
+@dataclass(frozen=True, slots=True)
 class LogTransaction:
     def log_transaction(
-        self, customer_data: CustomerData, payment_data: PaymentData, charge
+        self, customer_data: CustomerDataFast, payment_data: PaymentDataFast, charge
+    ):
+        # The buffer is flushed before a record that does not fit, so each
+        # record reaches the file whole, inside one O_APPEND write
+        record = _format_log_record(customer_data, payment_data, charge)
+        _transaction_log().write(record)
+
+
+@dataclass
+class UringLogTransaction:
+    # Queues one io_uring write per record and submits the batch once it
+    # holds `entries` records or `max_pending_bytes` bytes, and at least every
+    # `flush_interval` seconds from a background thread; a crash loses at
+    # most that batch.
+    # Writes are linked, so records land in the order they were logged.
+    # Falls back to the buffered writer when liburing is missing or the
+    # kernel refuses to set up a ring. Do not
+    # point a LogTransaction at the same file: its buffered records would
+    # interleave with these batches at flush granularity.
+    entries: int = LOG_URING_ENTRIES
+    max_pending_bytes: int = LOG_BUFFER_SIZE
+    flush_interval: float = LOG_FLUSH_INTERVAL
+
+    def __post_init__(self):
+        self._ring = None
+        self._closed = threading.Event()
+        if liburing is None:
+            return
+        self._lock = threading.Lock()
+        self._pending: list[bytes] = []
+        self._pending_bytes = 0
+        self._last_sqe = None
+        self._cqe = liburing.Cqe()
+        self._fd = os.open(
+            TRANSACTIONS_LOG, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+        )
+        ring = liburing.Ring()
+        try:
+            liburing.io_uring_queue_init(self.entries, ring)
+        except OSError as e:
+            # io_uring can be disabled by seccomp or the io_uring_disabled sysctl
+            logger.warning("io_uring unavailable, using buffered log: %s", e)
+            os.close(self._fd)
+            return
+        self._ring = ring
+        atexit.register(self.close)
+        _start_flush_thread(self.flush, self.flush_interval, self._closed)
+
+    def log_transaction(
+        self, customer_data: CustomerDataFast, payment_data: PaymentDataFast, charge
     ):
-        with open("transactions.log", "a") as log_file:
-            log_file.write(f"{customer_data.name} paid {payment_data.amount}\n")
-            log_file.write(f"Transaction ID: {charge.id}\n")
-            log_file.write(f"Status: {charge.status}\n")
+        if self._ring is None:
+            return LOG_TRANSACTION.log_transaction(customer_data, payment_data, charge)
+        record = _format_log_record(customer_data, payment_data, charge)
+        with self._lock:
+            sqe = liburing.io_uring_get_sqe(self._ring)
+            liburing.io_uring_prep_write(sqe, self._fd, record)
+            if self._last_sqe is not None:
+                # Chain to the previous write so the batch runs in order
+                liburing.io_uring_sqe_set_flags(self._last_sqe, liburing.IOSQE_IO_LINK)
+            self._last_sqe = sqe
+            # The kernel reads from `record` until its completion is reaped
+            self._pending.append(record)
+            self._pending_bytes += len(record)
+            if (
+                len(self._pending) >= self.entries
+                or self._pending_bytes >= self.max_pending_bytes
+            ):
+                self._flush()
+
+    def flush(self):
+        if self._ring is None:
+            if not self._closed.is_set():
+                _transaction_log().flush()
+            return
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        if self._ring is None:
+            return
+        self._closed.set()
+        with self._lock:
+            self._flush()
+            liburing.io_uring_queue_exit(self._ring)
+            os.close(self._fd)
+            self._ring = None
+
+    def _flush(self):
+        submitted = len(self._pending)
+        if not submitted:
+            return
+        liburing.io_uring_submit_and_wait(self._ring, submitted)
+        # Reap every completion before raising: a failed linked write cancels
+        # the rest of the chain, and unreaped -ECANCELED entries would be
+        # counted by the next flush. Reading `res` raises for a failed write
+        completed = 0
+        errors = []
+        try:
+            while completed < submitted:
+                liburing.io_uring_wait_cqe(self._ring, self._cqe)
+                ready = liburing.io_uring_cq_ready(self._ring)
+                for i in range(ready):
+                    try:
+                        self._cqe[i].res
+                    except OSError as e:
+                        errors.append(e)
+                liburing.io_uring_cq_advance(self._ring, ready)
+                completed += ready
+        finally:
+            self._pending.clear()
+            self._pending_bytes = 0
+            self._last_sqe = None
+        if errors:
+            raise errors[0]
 
 
 class PaymentProcessorProtocol(Protocol):
     def process_transaction(
-        self, customer_data: CustomerData, payment_data: PaymentData
+        self, customer_data: CustomerDataFast, payment_data: PaymentDataFast
+    ) -> PaymentResponse: ...
+
+
+class AsyncPaymentBatchProtocol(Protocol):
+    async def process_transaction(
+        self, customer_data: CustomerDataFast, payment_data: PaymentDataFast
     ) -> PaymentResponse: ...
 
 
+class AsyncPaymentProcessorProtocol(Protocol):
+    def open_batch(self) -> AsyncContextManager[AsyncPaymentBatchProtocol]: ...
+
+
 class RefundPaymentProtocol(Protocol):
     def refund_transaction(self, transaction_id: str) -> PaymentResponse: ...
 
 
 class RecurrencePaymentProtocol(Protocol):
     def setup_recurrence(
-        self, customer_data: CustomerData, payment_data: PaymentData
+        self, customer_data: CustomerDataFast, payment_data: PaymentDataFast
     ) -> PaymentResponse: ...
 
 
+def _idempotency_key(payment_data: PaymentDataFast, operation: str) -> Optional[str]:
+    # A retried payment reuses its payment_id, so Stripe replays the original
+    # result instead of repeating the operation; without one, send no key
+    if payment_data.payment_id is None:
+        return None
+    return f"{operation}:{payment_data.payment_id}"
+
+
 @dataclass
 class ProcessPayment(
     PaymentProcessorProtocol, RefundPaymentProtocol, RecurrencePaymentProtocol
 ):
     def process_transaction(
-        self, customer_data: CustomerData, payment_data: PaymentData
+        self, customer_data: CustomerDataFast, payment_data: PaymentDataFast
     ):
-        stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
         try:
             charge = stripe.Charge.create(
                 amount=payment_data.amount,
                 currency="usd",
                 source=payment_data.source,
                 description="Charge for " + customer_data.name,
+                idempotency_key=_idempotency_key(payment_data, "charge"),
             )
-            print("Payment successful")
+            logger.info("Payment successful")
             return PaymentResponse(
                 status=charge["status"],
                 amount=charge["amount"],
@@ -140,13 +432,13 @@ class ProcessPayment(
                 message="Payment successful",
             )
         except StripeError as e:
-            print("Payment failed:", e)
+            logger.warning("Payment failed: %s", e)
             return PaymentResponse(
                 status="payment_failed", amount=0, id=None, message=str(e)
             )
 
     def refund_transaction(self, transaction_id: str) -> PaymentResponse:
-        print("Refunding payment")
+        logger.info("Refunding payment")
         return PaymentResponse(
             status="payment_refunded",
             amount=0,
@@ -155,22 +447,23 @@ class ProcessPayment(
         )
 
     def setup_recurrence(
-        self, customer_data: CustomerData, payment_data: PaymentData
+        self, customer_data: CustomerDataFast, payment_data: PaymentDataFast
     ) -> PaymentResponse:
-        stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
-        price_id = os.getenv("STRIPE_PRICE_ID")
         try:
-            customer = stripe.Customer.create(email=customer_data.contact_info.email)
-            payment_method = self.__attach_payment_method(
-                customer.id, payment_data.source
+            customer = stripe.Customer.create(
+                email=customer_data.contact_info.email,
+                payment_method=payment_data.source,
+                invoice_settings={"default_payment_method": payment_data.source},
+                idempotency_key=_idempotency_key(payment_data, "customer"),
             )
-            self.__set_default_payment_method(customer.id, payment_method.id)
             subscription = stripe.Subscription.create(
                 customer=customer.id,
-                items=[{"price": price_id}],
+                items=[{"price": STRIPE_PRICE_ID}],
+                default_payment_method=payment_data.source,
                 expand=["latest_invoice.payment_intent"],
+                idempotency_key=_idempotency_key(payment_data, "subscription"),
             )
-            print("Recurrence payment successful")
+            logger.info("Recurrence payment successful")
             amount = subscription["items"]["data"][0]["price"]["unit_amount"]
             return PaymentResponse(
                 status=subscription["status"],
@@ -179,26 +472,76 @@ class ProcessPayment(
                 message="Recurrence payment successful",
             )
         except StripeError as e:
-            print("Recurrence payment failed:", e)
+            logger.warning("Recurrence payment failed: %s", e)
             return PaymentResponse(
                 status="recurrence_payment_failed", amount=0, id=None, message=str(e)
             )
 
-    def __attach_payment_method(self, customer_id: str, payment_method_id: str):
-        return stripe.PaymentMethod.attach(payment_method_id, customer=customer_id)
 
-    def __set_default_payment_method(self, customer_id: str, payment_method_id: str):
-        stripe.Customer.modify(
-            customer_id, invoice_settings={"default_payment_method": payment_method_id}
-        )
+@dataclass
+class AsyncStripeBatch(AsyncPaymentBatchProtocol):
+    # Owns the Stripe client of a single process_payments_many call
+    client: Optional[stripe.StripeClient]
+    error: Optional[StripeError] = None
+
+    async def process_transaction(
+        self, customer_data: CustomerDataFast, payment_data: PaymentDataFast
+    ) -> PaymentResponse:
+        if self.client is None:
+            # Report the missing client per item, as the sync path does
+            logger.warning("Payment failed: %s", self.error)
+            return PaymentResponse(
+                status="payment_failed", amount=0, id=None, message=str(self.error)
+            )
+        try:
+            charge = await self.client.charges.create_async(
+                params={
+                    "amount": payment_data.amount,
+                    "currency": "usd",
+                    "source": payment_data.source,
+                    "description": "Charge for " + customer_data.name,
+                },
+                options={"idempotency_key": _idempotency_key(payment_data, "charge")},
+            )
+            logger.info("Payment successful")
+            return PaymentResponse(
+                status=charge["status"],
+                amount=charge["amount"],
+                id=charge["id"],
+                message="Payment successful",
+            )
+        except StripeError as e:
+            logger.warning("Payment failed: %s", e)
+            return PaymentResponse(
+                status="payment_failed", amount=0, id=None, message=str(e)
+            )
+
+
+@dataclass
+class AsyncProcessPayment(AsyncPaymentProcessorProtocol):
+    @asynccontextmanager
+    async def open_batch(self) -> AsyncIterator[AsyncStripeBatch]:
+        # An aiohttp session is bound to the event loop that opened it, so
+        # every batch gets its own client and closes it when done
+        http_client = AIOHTTPClient()
+        try:
+            try:
+                batch = AsyncStripeBatch(
+                    stripe.StripeClient(STRIPE_SECRET_KEY, http_client=http_client)
+                )
+            except StripeError as e:
+                batch = AsyncStripeBatch(None, e)
+            yield batch
+        finally:
+            await http_client.close_async()
 
 
 class OffLinePaymentProcessor(PaymentProcessorProtocol):
 
     def process_payments(
-        self, customer_data: CustomerData, payment_data: PaymentData
+        self, customer_data: CustomerDataFast, payment_data: PaymentDataFast
     ) -> PaymentResponse:
-        print("Offline payment processed successfully")
+        logger.info("Offline payment processed successfully")
         return PaymentResponse(
             status="offline_payment_processed",
             amount=payment_data.amount,
@@ -207,18 +550,42 @@ class OffLinePaymentProcessor(PaymentProcessorProtocol):
         )
 
 
+# Stateless defaults shared by every PaymentService, overridable per service
+VALIDATE_DATA = ValidateData()
+VALIDATE_PAYMENT = ValidatePaymentData()
+LOG_TRANSACTION = LogTransaction()
+
+
 @dataclass
 class PaymentService:
-    validate_data = ValidateData()
-    validate_payment_data = ValidatePaymentData()
     process_payment: PaymentProcessorProtocol = field(default_factory=ProcessPayment)
     notify: Notify = field(default_factory=EmailNotify)
-    log_transaction = LogTransaction()
     refund_payment_processor: Optional[RefundPaymentProtocol] = None
     recurrence_payment_processor: Optional[RecurrencePaymentProtocol] = None
+    async_payment_processor: Optional[AsyncPaymentProcessorProtocol] = None
+    # Declared last so positional construction keeps its original order
+    validate_data: ValidateData = VALIDATE_DATA
+    validate_payment_data: ValidatePaymentData = VALIDATE_PAYMENT
+    log_transaction: LogTransactionProtocol = LOG_TRANSACTION
 
     def process_payments(
         self, payment_data: PaymentData, customer_data: CustomerData
+    ) -> PaymentResponse:
+        return self._process_payments(payment_data.to_fast(), customer_data.to_fast())
+
+    def process_payments_json(
+        self, raw_payment_data: bytes, raw_customer_data: bytes
+    ) -> PaymentResponse:
+        try:
+            payment_data = _PAYMENT_DECODER.decode(raw_payment_data)
+            customer_data = _CUSTOMER_DECODER.decode(raw_customer_data)
+        except msgspec.MsgspecError as e:
+            logger.error("Error processing payment: %s", e)
+            raise e
+        return self._process_payments(payment_data, customer_data)
+
+    def _process_payments(
+        self, payment_data: PaymentDataFast, customer_data: CustomerDataFast
     ) -> PaymentResponse:
         try:
             self.validate_data.validate_customer_data(customer_data)
@@ -230,9 +597,62 @@ class PaymentService:
             self.log_transaction.log_transaction(customer_data, payment_data, charge)
             return charge
         except Exception as e:
-            print(f"Error processing payment: {e}")
+            logger.error("Error processing payment: %s", e)
             raise e
 
+    def process_batch(
+        self, batch: list[tuple[PaymentData, CustomerData]]
+    ) -> list[Union[PaymentResponse, Exception]]:
+        # Stripe calls release the GIL while waiting on the socket, so
+        # threads overlap them; failed items return their exception
+        with ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(self.process_payments, payment, customer)
+                for payment, customer in batch
+            ]
+        return [future.exception() or future.result() for future in futures]
+
+    async def process_payments_many(
+        self, payments: list[tuple[PaymentData, CustomerData]]
+    ) -> list[Union[PaymentResponse, Exception]]:
+        if not self.async_payment_processor:
+            raise Exception("Async payment processor not supported")
+        semaphore = asyncio.Semaphore(STRIPE_MAX_CONCURRENCY)
+
+        async def process(
+            processor: AsyncPaymentBatchProtocol,
+            payment_data: PaymentData,
+            customer_data: CustomerData,
+        ) -> PaymentResponse:
+            try:
+                customer_data = customer_data.to_fast()
+                payment_data = payment_data.to_fast()
+                self.validate_data.validate_customer_data(customer_data)
+                self.validate_payment_data.validate_payment_data(payment_data)
+                async with semaphore:
+                    charge = await processor.process_transaction(
+                        customer_data, payment_data
+                    )
+                self.notify.notify_customer(customer_data)
+                self.log_transaction.log_transaction(
+                    customer_data, payment_data, charge
+                )
+                return charge
+            except Exception as e:
+                logger.error("Error processing payment: %s", e)
+                raise e
+
+        # Failed items return their exception so one bad payment never
+        # cancels charges that are already in flight
+        async with self.async_payment_processor.open_batch() as processor:
+            return await asyncio.gather(
+                *(
+                    process(processor, payment, customer)
+                    for payment, customer in payments
+                ),
+                return_exceptions=True,
+            )
+
     def refund_payment(self, transaction_id: str) -> PaymentResponse:
         if not self.refund_payment_processor:
             raise Exception("Refund payment processor not supported")
@@ -245,6 +665,8 @@ class PaymentService:
     ) -> PaymentResponse:
         if not self.recurrence_payment_processor:
             raise Exception("Recurrence payment processor not supported")
+        customer_data = customer_data.to_fast()
+        payment_data = payment_data.to_fast()
         response = self.recurrence_payment_processor.setup_recurrence(
             customer_data, payment_data
         )
@@ -253,6 +675,8 @@ class PaymentService:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     sms_notify = SMSNotify()
 
     payment_service = PaymentService()
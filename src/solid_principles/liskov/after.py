@@ -1,16 +1,27 @@
+import logging
 import os
 from dataclasses import dataclass, field
 from typing import Optional, Protocol
 import stripe
 from stripe.error import StripeError
-from stripe import Charge
+from stripe import Charge, RequestsClient
 from dotenv import load_dotenv
 from email.mime.text import MIMEText
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file
 _ = load_dotenv()
 
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
+
+stripe.api_key = STRIPE_SECRET_KEY
+
+# Share one pooled HTTP session across every Stripe call
+if stripe.default_http_client is None:
+    stripe.default_http_client = RequestsClient(verify_ssl_certs=True)
+
 class ContactInfo(BaseModel):
     email: Optional[str] = None
     phone: Optional[str] = None
@@ -27,13 +38,13 @@ class PaymentData(BaseModel):
 class ValidateData:
     def validate_customer_data(self, customer_data: CustomerData):
         if not customer_data.name:
-            print("Invalid customer data: missing name")
+            logger.warning("Invalid customer data: missing name")
             raise ValueError("Invalid customer data: missing name")
         if not customer_data.contact_info:
-            print("Invalid customer data: missing contact info")
+            logger.warning("Invalid customer data: missing contact info")
             raise ValueError("Invalid customer data: missing contact info")
         if not customer_data.contact_info.email and not customer_data.contact_info.phone:
-            print("Invalid customer data: missing email or phone")
+            logger.warning("Invalid customer data: missing email or phone")
             raise ValueError("Invalid customer data: missing email or phone")
         return
 
@@ -41,7 +52,7 @@ class ValidateData:
 class ValidatePaymentData:
     def validate_payment_data(self, payment_data: PaymentData):
         if not payment_data.amount or not payment_data.source:
-            print("Invalid payment data")
+            logger.warning("Invalid payment data")
             raise ValueError("Invalid payment data")
         return True
 
@@ -65,7 +76,7 @@ class EmailNotify(Notify):
             msg["Subject"] = "Payment Confirmation"
             msg["From"] = "no-reply@example.com"
             msg["To"] = customer_data.contact_info.email
-            print("Email sent to", customer_data.contact_info.email)
+            logger.info("Email sent to %s", customer_data.contact_info.email)
             return 
 
 @dataclass
@@ -73,7 +84,7 @@ class SMSNotify(Notify):
     def notify_customer(self, customer_data: CustomerData):
             phone_number = customer_data.contact_info.phone
             sms_gateway = "the custom SMS Gateway"
-            print(f"send the sms using {sms_gateway}: SMS sent to {phone_number}: Thank you for your payment.")
+            logger.info("send the sms using %s: SMS sent to %s: Thank you for your payment.", sms_gateway, phone_number)
             return
 
 @dataclass
@@ -103,7 +114,6 @@ class PaymentProcessor(Protocol):
 @dataclass
 class ProcessPayment(PaymentProcessor):
     def process_transaction(self, customer_data: CustomerData, payment_data: PaymentData):
-        stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
         try:
             charge = stripe.Charge.create(
                 amount=payment_data.amount,
@@ -111,10 +121,10 @@ class ProcessPayment(PaymentProcessor):
                 source=payment_data.source,
                 description="Charge for " + customer_data.name,
             )
-            print("Payment successful")
+            logger.info("Payment successful")
             return charge
         except StripeError as e:
-            print("Payment failed:", e)
+            logger.warning("Payment failed: %s", e)
             raise e
 
 @dataclass
@@ -134,10 +144,11 @@ class PaymentService:
             self.log_transaction.log_transaction(customer_data, payment_data, charge)
             return charge
         except Exception as e:
-            print(f"Error processing payment: {e}")
+            logger.error("Error processing payment: %s", e)
             raise e
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     sms_notify = SMSNotify()
     payment_service = PaymentService()
     payment_service_sms = PaymentService(notify=sms_notify)
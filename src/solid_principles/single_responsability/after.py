@@ -1,3 +1,4 @@
+import logging
 import os
 from dataclasses import dataclass
 import stripe
@@ -7,17 +8,23 @@ from dotenv import load_dotenv
 from email.mime.text import MIMEText
 
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file
 _ = load_dotenv()
 
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
+
+stripe.api_key = STRIPE_SECRET_KEY
+
 @dataclass
 class ValidateData:
     def validate_customer_data(self, customer_data):
         if not customer_data.get("name"):
-            print("Invalid customer data: missing name")
+            logger.warning("Invalid customer data: missing name")
             raise ValueError("Invalid customer data: missing name")
         if not customer_data.get("contact_info"):
-            print("Invalid customer data: missing contact info")
+            logger.warning("Invalid customer data: missing contact info")
             raise ValueError("Invalid customer data: missing contact info")
         return True
 
@@ -25,7 +32,7 @@ class ValidateData:
 class ValidatePaymentData:
     def validate_payment_data(self, payment_data):         
         if not payment_data.get("source"):
-            print("Invalid payment data")
+            logger.warning("Invalid payment data")
             raise ValueError("Invalid payment data")
         return True
 
@@ -37,13 +44,13 @@ class NotifyCustomer:
             msg["Subject"] = "Payment Confirmation"
             msg["From"] = "no-reply@example.com"
             msg["To"] = customer_data["contact_info"]["email"]
-            print("Email sent to", customer_data["contact_info"]["email"])
+            logger.info("Email sent to %s", customer_data["contact_info"]["email"])
         elif "phone" in customer_data["contact_info"]:
             phone_number = customer_data["contact_info"]["phone"]
             sms_gateway = "the custom SMS Gateway"
-            print(f"send the sms using {sms_gateway}: SMS sent to {phone_number}: Thank you for your payment.")
+            logger.info("send the sms using %s: SMS sent to %s: Thank you for your payment.", sms_gateway, phone_number)
         else:
-            print("No valid contact information for notification")
+            logger.warning("No valid contact information for notification")
 
 @dataclass
 class LogTransaction:
@@ -55,7 +62,6 @@ class LogTransaction:
 @dataclass
 class ProcessPayment:
     def process_transaction(self, customer_data, payment_data):
-        stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
         try:
             charge = stripe.Charge.create(
                 amount=payment_data["amount"],
@@ -63,10 +69,10 @@ class ProcessPayment:
                 source=payment_data["source"],
                 description="Charge for " + customer_data["name"],
             )
-            print("Payment successful")
+            logger.info("Payment successful")
             return charge 
         except StripeError as e:
-            print("Payment failed:", e)
+            logger.warning("Payment failed: %s", e)
             raise e
 
 @dataclass
@@ -86,10 +92,11 @@ class PaymentService:
             self.log_transaction.log_transaction(customer_data, payment_data, charge)
             return charge
         except Exception as e:
-            print(f"Error processing payment: {e}")
+            logger.error("Error processing payment: %s", e)
             raise e
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     payment_service = PaymentService()
 
     customer_data_with_email = {
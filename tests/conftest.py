@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The SOLID stages are plain modules under src/solid_principles
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "src", "solid_principles")
+)
@@ -0,0 +1,129 @@
+import asyncio
+import functools
+import socket
+
+import msgspec
+import pytest
+import stripe
+from aiohttp import web
+
+from isp import after
+
+
+async def _fake_charge(request):
+    data = await request.post()
+    # Keep the charge in flight long enough for batches to overlap
+    await asyncio.sleep(0.3)
+    return web.json_response(
+        {
+            "id": "ch_" + data["amount"],
+            "object": "charge",
+            "status": "succeeded",
+            "amount": int(data["amount"]),
+        }
+    )
+
+
+@pytest.fixture(autouse=True)
+def _log_in_tmp_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def fake_stripe(monkeypatch, unused_port):
+    monkeypatch.setattr(after, "STRIPE_SECRET_KEY", "sk_test_fake")
+    monkeypatch.setattr(
+        stripe,
+        "StripeClient",
+        functools.partial(
+            stripe.StripeClient,
+            base_addresses={"api": f"http://127.0.0.1:{unused_port}"},
+        ),
+    )
+    return unused_port
+
+
+def _customer():
+    return after.CustomerData(
+        name="John Doe", contact_info=after.ContactInfo(email="example@mail.com")
+    )
+
+
+def test_overlapping_batches_keep_their_own_client(fake_stripe):
+    service = after.PaymentService(async_payment_processor=after.AsyncProcessPayment())
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/v1/charges", _fake_charge)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", fake_stripe).start()
+        try:
+            first = service.process_payments_many(
+                [(after.PaymentData(amount=100, source="tok_visa"), _customer())]
+            )
+
+            async def second():
+                await asyncio.sleep(0.1)
+                return await service.process_payments_many(
+                    [(after.PaymentData(amount=200, source="tok_visa"), _customer())]
+                )
+
+            return await asyncio.gather(first, second())
+        finally:
+            await runner.cleanup()
+
+    first, second = asyncio.run(run())
+
+    assert [r.status for r in first] == ["succeeded"]
+    assert [r.status for r in second] == ["succeeded"]
+    assert second[0].id == "ch_200"
+
+
+def test_missing_api_key_fails_per_item(monkeypatch):
+    monkeypatch.setattr(after, "STRIPE_SECRET_KEY", None)
+    service = after.PaymentService(async_payment_processor=after.AsyncProcessPayment())
+    invalid = after.CustomerData(name="", contact_info=after.ContactInfo(phone="1"))
+
+    results = asyncio.run(
+        service.process_payments_many(
+            [
+                (after.PaymentData(amount=100, source="tok_visa"), _customer()),
+                (after.PaymentData(amount=100, source="tok_visa"), invalid),
+            ]
+        )
+    )
+
+    assert results[0].status == "payment_failed"
+    assert isinstance(results[1], ValueError)
+
+
+def test_malformed_json_is_logged(caplog):
+    service = after.PaymentService()
+
+    with pytest.raises(msgspec.ValidationError):
+        service.process_payments_json(
+            b'{"amount": "500", "source": "tok_visa"}',
+            b'{"name": "John Doe", "contact_info": {"phone": "1"}}',
+        )
+
+    assert "Error processing payment" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "email", [None, "", "a@b.com\r\nBcc: x@y.com", "jö@example.com"]
+)
+def test_email_notify_rejects_unusable_address(email):
+    customer = after.CustomerDataFast(
+        name="John Doe", contact_info=after.ContactInfoFast(email=email)
+    )
+
+    with pytest.raises(ValueError):
+        after.EmailNotify().notify_customer(customer)